@@ -1,3 +1,4 @@
+import logging
 import os
 from dotenv import load_dotenv
 
@@ -30,3 +31,15 @@ TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
 # --- Timeouts ---
 REQUEST_TIMEOUT = 15
 MAX_RETRIES = 2
+
+# --- Profiling (python3 main.py --profile, ou VIGICRUES_PROFILE=1) ---
+PROFILE_ENABLED = os.getenv("VIGICRUES_PROFILE", "").lower() in ("1", "true", "yes")
+PROFILE_KEEP_DEFAULT = 10  # runs conservés
+try:
+    PROFILE_KEEP = max(int(os.getenv("VIGICRUES_PROFILE_KEEP", PROFILE_KEEP_DEFAULT)), 1)
+except ValueError:
+    logging.getLogger(__name__).warning(
+        "VIGICRUES_PROFILE_KEEP invalide, %d utilisé", PROFILE_KEEP_DEFAULT
+    )
+    PROFILE_KEEP = PROFILE_KEEP_DEFAULT
+PROFILE_TOP_ALLOCS = 25
@@ -5,6 +5,7 @@ Fetches water level data, generates a dashboard, pushes to GitHub Pages,
 and sends Discord alerts when thresholds are exceeded.
 """
 
+import argparse
 import json
 import logging
 import os
@@ -16,6 +17,7 @@ from fetch_data import fetch_observations, fetch_previsions
 from generate_html import generate_html, save_html
 from push_github import push_to_github
 from notify import notify_vigilance, notify_surveillance, notify_retour_normal
+from profiling import ProfileSession
 
 # --- Logging setup ---
 LOG_DIR = "/var/log/vigicrues-monitor"
@@ -90,7 +92,23 @@ def evaluate_alerts(level: float, trend: str, state: dict) -> dict:
     return state
 
 
+def _stages() -> dict:
+    """Return the pipeline stages, looked up when the run starts."""
+    return {
+        "fetch_observations": fetch_observations,
+        "fetch_previsions": fetch_previsions,
+        "generate_html": generate_html,
+        "push_to_github": push_to_github,
+        "evaluate_alerts": evaluate_alerts,
+    }
+
+
 def main():
+    _run(**_stages())
+
+
+def _run(*, fetch_observations, fetch_previsions, generate_html, push_to_github, evaluate_alerts):
+    """Run one monitoring cycle with the given stages."""
     logger.info("=== Démarrage vigicrues-monitor ===")
     state = load_state()
 
@@ -143,5 +161,22 @@ def main():
     logger.info("Terminé — niveau actuel : %.2fm %s", current_level, trend)
 
 
+def run_profiled():
+    """Run main() under cProfile and tracemalloc, with each stage instrumented."""
+    with ProfileSession(LOG_DIR) as session:
+        stages = {name: session.wrap(name, func) for name, func in _stages().items()}
+        session.wrap("main", _run)(**stages)
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Vigicrues Monitor — La Moine à Clisson")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help=f"profile CPU et mémoire, dumps dans {LOG_DIR}/profiles/",
+    )
+    args = parser.parse_args()
+
+    if args.profile or config.PROFILE_ENABLED:
+        run_profiled()
+    else:
+        main()
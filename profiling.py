@@ -0,0 +1,142 @@
+"""Optional CPU and memory profiling of a monitor run (cProfile + tracemalloc)."""
+
+import cProfile
+import functools
+import logging
+import os
+import pstats
+import re
+import shutil
+import time
+import tracemalloc
+from datetime import datetime
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Frames of the profiler itself, dropped from the allocation reports
+_OWN_FILES = (tracemalloc.__file__, __file__)
+
+
+class ProfileSession:
+    """Profile one run and write its dumps under <log_dir>/profiles/<run>/.
+
+    A single cProfile profiler stays enabled for the whole run, so main.prof
+    keeps the full call tree; each stage shows up as its own `<stage name>`
+    node. While the run is profiled, stages only take raw tracemalloc
+    snapshots (cheap, and not traced themselves); allocation diffs are
+    computed once the profiler is off.
+    """
+
+    def __init__(self, log_dir: str):
+        self.profiles_dir = os.path.join(log_dir, "profiles")
+        run_name = f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        self.run_dir = os.path.join(self.profiles_dir, run_name)
+        self._profile = cProfile.Profile()
+        self._stages = {}  # name -> wrapped function
+        self._allocs = []  # (name, elapsed, peak, growth, before, after)
+        self._open = []  # [start memory, peak] of the stages in progress
+        self._run_peak = 0
+
+    def __enter__(self):
+        tracemalloc.start()
+        self._run_snapshot = tracemalloc.take_snapshot()
+        self._run_start = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profile.disable()
+        elapsed = time.perf_counter() - self._run_start
+        self._fold_peak()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self._allocs.insert(0, ("run", elapsed, self._run_peak, None,
+                                self._run_snapshot, snapshot))
+        try:
+            self._write()
+            _prune(self.profiles_dir, config.PROFILE_KEEP)
+        except OSError as e:
+            logger.error("Impossible d'écrire le profil dans %s : %s", self.run_dir, e)
+        else:
+            logger.info("Profil écrit dans %s (%.2fs, pic mémoire %.1f Kio)",
+                        self.run_dir, elapsed, self._run_peak / 1024)
+        return False
+
+    def wrap(self, name: str, func):
+        """Return func instrumented as stage `name`."""
+        self._stages[name] = func
+
+        def wrapper(*args, **kwargs):
+            before = tracemalloc.take_snapshot()
+            # Fold the peak into every open stage before resetting it
+            self._fold_peak()
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            frame = [current, current]
+            self._open.append(frame)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self._fold_peak()
+                self._open.remove(frame)
+                after = tracemalloc.take_snapshot()
+                self._allocs.append((name, elapsed, frame[1], frame[1] - frame[0],
+                                     before, after))
+
+        # One code object per stage, so cProfile keeps each stage as its own node
+        wrapper.__code__ = wrapper.__code__.replace(co_name=f"<stage {name}>")
+        return functools.wraps(func)(wrapper)
+
+    def _fold_peak(self):
+        """Record the tracemalloc peak since the last reset in the run and open stages."""
+        _, peak = tracemalloc.get_traced_memory()
+        self._run_peak = max(self._run_peak, peak)
+        for frame in self._open:
+            frame[1] = max(frame[1], peak)
+
+    def _write(self):
+        os.makedirs(self.run_dir, exist_ok=True)
+
+        self._profile.dump_stats(os.path.join(self.run_dir, "main.prof"))
+        with open(os.path.join(self.run_dir, "stages.txt"), "w") as f:
+            stats = pstats.Stats(self._profile, stream=f).sort_stats("cumulative")
+            for name, func in self._stages.items():
+                code = func.__code__
+                pattern = re.escape(f"{code.co_filename}:{code.co_firstlineno}({code.co_name})")
+                f.write(f"=== {name} ===\n")
+                stats.print_stats(pattern)
+                stats.print_callees(pattern)
+
+        with open(os.path.join(self.run_dir, "allocations.txt"), "w") as f:
+            for name, elapsed, peak, growth, before, after in self._allocs:
+                if growth is None:
+                    f.write(f"=== {name} — {elapsed:.3f}s, pic total {peak / 1024:.1f} Kio ===\n")
+                else:
+                    f.write(f"=== {name} — {elapsed:.3f}s, pic +{growth / 1024:.1f} Kio "
+                            f"(pic total {peak / 1024:.1f} Kio) ===\n")
+                for stat in _top_allocs(before, after):
+                    f.write(f"{stat}\n")
+                f.write("\n")
+
+
+def _top_allocs(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> list:
+    """Return the top allocation sites between two snapshots, profiler frames excluded."""
+    top = [
+        stat for stat in after.compare_to(before, "lineno")
+        if stat.traceback[0].filename not in _OWN_FILES
+    ]
+    return top[:config.PROFILE_TOP_ALLOCS]
+
+
+def _prune(profiles_dir: str, keep: int):
+    """Delete all but the `keep` most recent run directories."""
+    runs = sorted(
+        d for d in os.listdir(profiles_dir)
+        if os.path.isdir(os.path.join(profiles_dir, d))
+    )
+    for d in runs[:-keep]:
+        shutil.rmtree(os.path.join(profiles_dir, d), ignore_errors=True)